@@ -1,5 +1,6 @@
 from fastapi import FastAPI, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from dotenv import load_dotenv
 from typing import Optional, List, Dict, Any
 from pathlib import Path
@@ -13,7 +14,7 @@ except Exception:  # pragma: no cover - optional dependency
 import httpx
 from .normalizer import get_default_normalizer
 from .routers.previsao_router import router as previsao_router
-from .repositories.supabase_repo import get_supabase_client, rpc_timeseries_aggregated
+from .repositories.supabase_repo import get_supabase_client, rpc_timeseries_aggregated, close_http_client
 from .env_utils import ensure_loaded_backend_env
 
 # load backend/.env if present (prefer the file inside the backend folder)
@@ -27,7 +28,9 @@ DATA_TABLE = os.getenv("DATA_TABLE", "distribuicao")
 _default_origins = "http://localhost:5173,http://127.0.0.1:5173,http://localhost:8080,http://127.0.0.1:8080,http://localhost:8081,http://127.0.0.1:8081"
 CORS_ORIGINS = os.getenv("CORS_ORIGINS", _default_origins).split(",")
 
-app = FastAPI(title="Vacina Normalizer API")
+# orjson-backed responses: noticeably faster than stdlib json for the
+# list-of-dict payloads the RPC endpoints return
+app = FastAPI(title="Vacina Normalizer API", default_response_class=ORJSONResponse)
 normalizer = get_default_normalizer()
 
 logger = logging.getLogger(__name__)
@@ -93,6 +96,8 @@ async def shutdown_event():
     global db_pool
     if db_pool:
         await db_pool.close()
+    # release the shared Supabase HTTP client and its pooled connections
+    await close_http_client()
 
 
 def _load_local_data() -> List[Dict[str, Any]]:
@@ -1,70 +1,297 @@
+import functools
 import json
 import re
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 import logging
 
+try:
+    import orjson  # type: ignore
+except Exception:  # pragma: no cover - optional dependency
+    orjson = None  # type: ignore
+
+try:
+    import ahocorasick  # type: ignore
+except Exception:  # pragma: no cover - optional dependency
+    ahocorasick = None  # type: ignore
+
+try:
+    import hyperscan  # type: ignore
+except Exception:  # pragma: no cover - optional dependency
+    hyperscan = None  # type: ignore
+
 logger = logging.getLogger(__name__)
 
+# Characters that make an alternation piece a "real" regex instead of a
+# plain keyword we can match with a multi-pattern literal scan.
+_REGEX_METACHARS = set("\\.^$*+?{}[]()|")
+
+# Uppercase escape sequences whose meaning would flip if the pattern were
+# simply lower-cased (e.g. \B, \S, \W, \D).
+_UPPER_ESCAPE_RE = re.compile(r"\\[A-Z]")
+
+# Compiled once at import so the hot path never depends on the global
+# (evictable) `re` pattern cache.
+_COVID_RE = re.compile(r"SARS[- ]?COV2|COVID[- ]?19", re.IGNORECASE)
+_VACINA_RE = re.compile(r"VACINA(?:\s*(?:P/|PARA|CONTRA)\s*)?(.*)$")
+_DILUENTE_CUT_RE = re.compile(r".*DILUENTE.*?")
+# str.translate deletion table: ~5x cheaper than a regex substitution for
+# stripping this fixed character class from the DILUENTE candidate
+_DILUENTE_STRIP_TABLE = str.maketrans("", "", "-(),0123456789")
+
 
 class Normalizer:
     def __init__(self, mappings_path: str = "backend/mappings.json"):
         self.mappings_path = Path(mappings_path)
         self.mappings = self.load_mappings()
+        self._literal_automaton, self._literal_re, self._literal_groups, self._residual = (
+            self._build_scanner(self.mappings)
+        )
+        self._hs_db, self._hs_vacinas = self._build_hyperscan(self.mappings)
+        self._scan_residual = self._codegen_residual(self._residual)
+        # memoize per-instance: inputs repeat heavily across dataset rows, so
+        # repeat calls become a dict lookup instead of a full mapping scan
+        self._cached_normalize_insumo = functools.lru_cache(maxsize=8192)(self._normalize_insumo_uncached)
+        self._cached_normalize_sigla = functools.lru_cache(maxsize=512)(self._normalize_sigla_uncached)
 
     def load_mappings(self) -> List[Dict[str, Any]]:
-        if not self.mappings_path.exists():
+        # open directly instead of probing with exists(); a missing file is
+        # the same empty-mappings case either way
+        try:
+            with self.mappings_path.open("rb") as f:
+                raw = f.read()
+        except OSError:
             return []
-        with self.mappings_path.open("r", encoding="utf-8") as f:
-            data = json.load(f)
-        # order by priority asc
-        return sorted(data, key=lambda x: x.get("priority", 100))
+        data = orjson.loads(raw) if orjson is not None else json.loads(raw)
+        # order by priority asc; priorities are small ints (0-100), so a
+        # stable bucketed pass beats a comparison sort with a key callable
+        buckets: List[List[Dict[str, Any]]] = [[] for _ in range(101)]
+        for m in data:
+            p = m.setdefault("priority", 100)
+            buckets[min(max(int(p), 0), 100)].append(m)
+        return [m for b in buckets for m in b]
+
+    @staticmethod
+    def _build_scanner(mappings: List[Dict[str, Any]]):
+        """Partition mapping patterns into literal keywords and true regexes.
+
+        Literal alternatives from every mapping are folded into a single
+        multi-pattern scanner (an Aho-Corasick automaton when the optional
+        `ahocorasick` package is installed, a combined alternation regex
+        otherwise) so one pass over the input covers all of them. Only the
+        pieces that use regex syntax stay as individually compiled patterns.
+        Priority order is preserved by tagging every literal with the index
+        of its mapping.
+        """
+        literals: List[Tuple[str, int]] = []  # (lowered keyword, mapping index)
+        residual: List[Tuple[int, Optional[re.Pattern], bool, str, Optional[str]]] = []
+        for idx, m in enumerate(mappings):
+            pat = m.get("pattern") or ""
+            if not pat:
+                continue
+            vac = m.get("vacina_normalizada")
+            regex_pieces = []
+            for piece in pat.split("|"):
+                if piece and not (_REGEX_METACHARS & set(piece)):
+                    literals.append((piece.lower(), idx))
+                elif piece:
+                    regex_pieces.append(piece)
+            if regex_pieces:
+                sub = "|".join(regex_pieces)
+                # Compile the lowered pattern without IGNORECASE and match it
+                # against the pre-lowered text, skipping per-character case
+                # folding in the engine. Uppercase escapes (\B, \S, \W, ...)
+                # change meaning when lowered, so those patterns keep
+                # IGNORECASE over the original text.
+                try:
+                    if _UPPER_ESCAPE_RE.search(sub):
+                        residual.append((idx, re.compile(sub, re.IGNORECASE), False, sub.lower(), vac))
+                    else:
+                        residual.append((idx, re.compile(sub.lower()), True, sub.lower(), vac))
+                except re.error:
+                    residual.append((idx, None, True, sub.lower(), vac))
+
+        automaton = None
+        literal_re = None
+        literal_groups: Dict[str, int] = {}
+        if literals and ahocorasick is not None:
+            automaton = ahocorasick.Automaton()
+            for kw, idx in literals:
+                # keep the lowest mapping index when the same keyword repeats
+                if not automaton.exists(kw) or automaton.get(kw) > idx:
+                    automaton.add_word(kw, idx)
+            automaton.make_automaton()
+        elif literals:
+            parts = []
+            for gi, (kw, idx) in enumerate(literals):
+                name = f"g{gi}"
+                literal_groups[name] = idx
+                parts.append(f"(?P<{name}>{re.escape(kw)})")
+            literal_re = re.compile("|".join(parts))
+        return automaton, literal_re, literal_groups, residual
+
+    @staticmethod
+    def _build_hyperscan(mappings: List[Dict[str, Any]]):
+        """Compile every mapping pattern into one Hyperscan database when the
+        optional `hyperscan` package is installed. Pattern ids follow the
+        priority order of the mappings so the lowest matching id wins. Any
+        compile failure disables the backend and the pure-Python scanner is
+        used instead."""
+        if hyperscan is None:
+            return None, []
+        pats: List[bytes] = []
+        vacs: List[Optional[str]] = []
+        for m in mappings:
+            pat = m.get("pattern") or ""
+            if not pat:
+                continue
+            pats.append(pat.encode())
+            vacs.append(m.get("vacina_normalizada"))
+        if not pats:
+            return None, []
+        try:
+            db = hyperscan.Database()
+            db.compile(
+                expressions=pats,
+                ids=list(range(len(pats))),
+                flags=[hyperscan.HS_FLAG_CASELESS | hyperscan.HS_FLAG_SINGLEMATCH] * len(pats),
+            )
+        except Exception:
+            logger.debug("Hyperscan compile failed; falling back to re-based scanner", exc_info=True)
+            return None, []
+        return db, vacs
+
+    def _scan_hyperscan(self, tx: str) -> Optional[str]:
+        hits: List[int] = []
+        self._hs_db.scan(tx.encode(), match_event_handler=lambda pat_id, start, end, flags, ctx=None: hits.append(pat_id))
+        if hits:
+            return self._hs_vacinas[min(hits)]
+        return None
+
+    @staticmethod
+    def _codegen_residual(residual):
+        """Specialize the residual scan for the loaded mappings via runtime
+        codegen: emit one straight-line function with the compiled patterns
+        and results bound as module constants, removing the per-entry tuple
+        unpacking and loop bookkeeping of the generic scanner. The
+        best_idx guards reproduce the priority cut-off of the loop. Returns
+        None (keeping the generic loop) when there is nothing to specialize
+        or exec fails."""
+        if not residual:
+            return None
+        ns: Dict[str, Any] = {}
+        lines = ["def _scan_residual(tx, tx_lower, best_idx):"]
+        for pos, (idx, cre, use_lower, lpat, vac) in enumerate(residual):
+            ns[f"_v{pos}"] = vac
+            lines.append(f"    if best_idx is not None and best_idx < {idx}: return None")
+            if cre is not None:
+                ns[f"_r{pos}"] = cre
+                target = "tx_lower" if use_lower else "tx"
+                lines.append(f"    if _r{pos}.search({target}) is not None: return _v{pos}")
+            else:
+                ns[f"_p{pos}"] = lpat
+                lines.append(f"    if _p{pos} in tx_lower: return _v{pos}")
+        lines.append("    return None")
+        try:
+            exec("\n".join(lines), ns)
+        except Exception:
+            logger.debug("residual scanner codegen failed", exc_info=True)
+            return None
+        return ns["_scan_residual"]
+
+    def _scan_mappings(self, tx: str, tx_lower: str) -> Optional[str]:
+        """Return the vacina_normalizada of the first mapping (in priority
+        order) whose pattern matches `tx`, scanning the text once for all
+        literal keywords before probing the residual regex subset."""
+        if self._hs_db is not None:
+            try:
+                return self._scan_hyperscan(tx)
+            except Exception:
+                # runtime scan failure: fall back to the pure-Python scanner
+                pass
+
+        best_idx: Optional[int] = None
+        if self._literal_automaton is not None:
+            for _, idx in self._literal_automaton.iter(tx_lower):
+                if best_idx is None or idx < best_idx:
+                    best_idx = idx
+        elif self._literal_re is not None:
+            for m in self._literal_re.finditer(tx_lower):
+                idx = self._literal_groups[m.lastgroup]
+                if best_idx is None or idx < best_idx:
+                    best_idx = idx
+
+        if self._scan_residual is not None:
+            vac = self._scan_residual(tx, tx_lower, best_idx)
+            if vac is not None:
+                return vac
+        else:
+            for idx, cre, use_lower, lpat, vac in self._residual:
+                if best_idx is not None and idx > best_idx:
+                    break
+                if cre is not None:
+                    if cre.search(tx_lower if use_lower else tx):
+                        return vac
+                elif lpat in tx_lower:
+                    return vac
+
+        if best_idx is not None:
+            return self.mappings[best_idx].get("vacina_normalizada")
+        return None
 
     def normalize_sigla(self, tx_sigla: Optional[str]) -> Optional[str]:
         if not tx_sigla:
             return None
         s = tx_sigla.strip().upper()
-        s = re.sub(r"^SES[\-\s./]*", "", s)
-        m = re.search(r"([A-Z]{2})$", s)
-        if m:
-            return m.group(1)
+        if not s:
+            return None
+        return self._cached_normalize_sigla(s)
+
+    def _normalize_sigla_uncached(self, s: str) -> Optional[str]:
+        # plain string ops: extracting a 2-letter UF does not need the regex
+        # engine (s arrives stripped and upper-cased from normalize_sigla)
+        if s.startswith("SES"):
+            s = s[3:].lstrip("-_ ./\t")
+        if len(s) >= 2 and s[-2:].isalpha():
+            return s[-2:]
         return s[:2] if s else None
 
     def normalize_insumo(self, tx_insumo: Optional[str]) -> Optional[str]:
         if not tx_insumo:
             return None
+        # strip before building the cache key so surrounding whitespace does
+        # not fragment the cache; real datasets repeat the same tx_insumo
+        # thousands of times.
         tx = tx_insumo.strip()
-        for m in self.mappings:
-            pat = m.get("pattern") or ""
-            try:
-                if pat and re.search(pat, tx, flags=re.IGNORECASE):
-                    return m.get("vacina_normalizada")
-            except re.error:
-                if pat and (pat.lower() in tx.lower()):
-                    return m.get("vacina_normalizada")
-
-        # special case for DILUENTE (try to extract vaccine name)
-        tx_upper = tx.upper()
-        if "DILUENTE" in tx_upper:
-            m0 = re.search(r"VACINA(?:\s*(?:P/|PARA|CONTRA)\s*)?(.*)$", tx_upper)
+        if not tx:
+            return None
+        return self._cached_normalize_insumo(tx)
+
+    def _normalize_insumo_uncached(self, tx: str) -> Optional[str]:
+        tx_lower = tx.lower()
+        vac = self._scan_mappings(tx, tx_lower)
+        if vac is not None:
+            return vac
+
+        # special case for DILUENTE (try to extract vaccine name). str.find on
+        # the already-lowered text keeps the common non-DILUENTE path free of
+        # any extra upper-casing; tx_upper is only built when needed.
+        if tx_lower.find("diluente") >= 0:
+            tx_upper = tx.upper()
+            m0 = _VACINA_RE.search(tx_upper)
             candidate = None
             if m0:
                 candidate = m0.group(1).strip()
             else:
-                candidate = re.sub(r".*DILUENTE.*?", "", tx_upper).strip()
+                candidate = _DILUENTE_CUT_RE.sub("", tx_upper).strip()
             if candidate:
-                candidate = re.sub(r"[\-\(\)\,\d]", "", candidate).strip()
-                for m in self.mappings:
-                    pat = m.get("pattern") or ""
-                    try:
-                        if pat and re.search(pat, candidate, flags=re.IGNORECASE):
-                            return m.get("vacina_normalizada")
-                    except re.error:
-                        if pat and (pat.lower() in candidate.lower()):
-                            return m.get("vacina_normalizada")
+                candidate = candidate.translate(_DILUENTE_STRIP_TABLE).strip()
+                vac = self._scan_mappings(candidate, candidate.lower())
+                if vac is not None:
+                    return vac
 
         # fallback SARS-COV2
-        if re.search(r"SARS[- ]?COV2|COVID[- ]?19", tx, flags=re.IGNORECASE):
+        if _COVID_RE.search(tx):
             return "Covid-19"
 
         return None
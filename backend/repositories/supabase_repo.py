@@ -9,6 +9,11 @@ try:
 except Exception:  # pragma: no cover - optional dependency
     create_client = None  # type: ignore
 
+try:
+    import numpy as np
+except Exception:  # pragma: no cover - optional dependency
+    np = None  # type: ignore
+
 
 def get_supabase_client():
     """Return a supabase client if SDK is installed and env vars are set.
@@ -24,10 +29,37 @@ def get_supabase_client():
     return create_client(SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY)
 
 
+# Single AsyncClient shared by every Supabase HTTP call. Creating a client
+# per request repeats TLS context/DNS resolver setup; keeping one alive for
+# the process reuses pooled connections instead.
+_HTTP_CLIENT: Optional[httpx.AsyncClient] = None
+
+
+async def get_http_client() -> httpx.AsyncClient:
+    """Return the process-wide AsyncClient, building it lazily on first use."""
+    global _HTTP_CLIENT
+    if _HTTP_CLIENT is None or _HTTP_CLIENT.is_closed:
+        limits = httpx.Limits(max_connections=100, max_keepalive_connections=20)
+        try:
+            _HTTP_CLIENT = httpx.AsyncClient(timeout=30.0, http2=True, limits=limits)
+        except ImportError:
+            # h2 extra not installed: plain HTTP/1.1 keep-alive still applies
+            _HTTP_CLIENT = httpx.AsyncClient(timeout=30.0, limits=limits)
+    return _HTTP_CLIENT
+
+
+async def close_http_client() -> None:
+    """Close the shared client (called from the app shutdown hook)."""
+    global _HTTP_CLIENT
+    if _HTTP_CLIENT is not None:
+        await _HTTP_CLIENT.aclose()
+        _HTTP_CLIENT = None
+
+
 async def http_rpc_call(rpc_url: str, headers: dict, body: dict) -> Tuple[int, Any]:
     try:
-        async with httpx.AsyncClient(timeout=30.0) as httpcli:
-            resp = await httpcli.post(rpc_url, json=body, headers=headers)
+        httpcli = await get_http_client()
+        resp = await httpcli.post(rpc_url, json=body, headers=headers)
         try:
             parsed = resp.json()
         except Exception:
@@ -37,6 +69,46 @@ async def http_rpc_call(rpc_url: str, headers: dict, body: dict) -> Tuple[int, A
         return 502, str(e)
 
 
+# Request headers and RPC URLs depend only on values loaded at startup, so
+# build them once per key/URL instead of per call.
+_HEADERS_CACHE: Dict[str, Dict[str, str]] = {}
+_RPC_URL_CACHE: Dict[Tuple[str, str], str] = {}
+
+
+def _rpc_headers(service_key: str) -> Dict[str, str]:
+    h = _HEADERS_CACHE.get(service_key)
+    if h is None:
+        h = {
+            "apikey": service_key,
+            "Authorization": f"Bearer {service_key}",
+            "Accept": "application/json",
+            "Content-Type": "application/json",
+        }
+        _HEADERS_CACHE[service_key] = h
+    return h
+
+
+def _rpc_url(supabase_url: str, rpc_name: str) -> str:
+    key = (supabase_url, rpc_name)
+    u = _RPC_URL_CACHE.get(key)
+    if u is None:
+        u = f"{supabase_url.rstrip('/')}/rest/v1/rpc/{rpc_name}"
+        _RPC_URL_CACHE[key] = u
+    return u
+
+
+# Remembers which parameter naming each RPC accepted ("plain" or
+# "underscored") so later calls try the working variant first and skip the
+# extra failed round-trip once warmed.
+_RPC_PARAM_CONVENTION: Dict[str, str] = {}
+
+# Key aliases accepted for RPC rows, probed in order. Module-level so
+# normalize_row does not rebuild tuples (or a picker closure) per row.
+_ANO_KEYS = ("ano", "year", "f0", "0", "ano_val")
+_QTY_KEYS = ("quantidade", "quant", "qtde", "f1", "1", "quantidade_val")
+_TIPO_KEYS = ("tipo_dado", "tipo", "f2", "2")
+
+
 def _coerce_number_for_extract(v: Any) -> Optional[float]:
     if v is None:
         return None
@@ -70,19 +142,25 @@ def normalize_row(item: Any) -> Optional[Dict[str, Any]]:
     if isinstance(item, dict):
         # Normalize incoming keys to lowercase so RPC payloads are case-insensitive.
         item_normalized = {str(k).lower(): v for k, v in item.items()}
-        ano_keys = ("ano", "year", "f0", "0", "ano_val")
-        qty_keys = ("quantidade", "quant", "qtde", "f1", "1", "quantidade_val")
-        tipo_keys = ("tipo_dado", "tipo", "f2", "2")
-
-        def _pick(keys):
-            for k in keys:
-                if k in item_normalized and item_normalized.get(k) is not None:
-                    return item_normalized.get(k)
-            return None
 
-        ano = _pick(ano_keys)
-        quantidade = _pick(qty_keys)
-        tipo = _pick(tipo_keys)
+        ano = None
+        for k in _ANO_KEYS:
+            v = item_normalized.get(k)
+            if v is not None:
+                ano = v
+                break
+        quantidade = None
+        for k in _QTY_KEYS:
+            v = item_normalized.get(k)
+            if v is not None:
+                quantidade = v
+                break
+        tipo = None
+        for k in _TIPO_KEYS:
+            v = item_normalized.get(k)
+            if v is not None:
+                tipo = v
+                break
 
         if ano is None or quantidade is None:
             vals = list(item_normalized.values())
@@ -176,16 +254,19 @@ def extract_number_from_rpc_result(data: Any) -> Optional[float]:
     return None
 
 
-async def rpc_get_historico_e_previsao_raw(client, supabase_url: str, service_key: str, params_plain: Dict[str, Any], params_underscored: Dict[str, Any]):
+async def rpc_get_historico_e_previsao_raw(supabase_url: str, service_key: str, params_plain: Dict[str, Any], params_underscored: Optional[Dict[str, Any]] = None):
     """Return (data, raw) where data is the RPC array (or wrapped) for
     the new RPC `obter_comparacao_dados`.
 
     Important: the RPC must always be called with the parameter `insumo_nome` (it
     may be `None`). To satisfy that requirement we ensure the plain payload
     contains the `insumo_nome` key even when its value is `None`.
-    Tries SDK then HTTP fallback.
+
+    Calls PostgREST directly over async HTTP. The supabase-py SDK path was
+    removed: its sync .execute() blocked the event loop for the whole RPC
+    duration and, when it failed, the HTTP call ran anyway, doubling the
+    round-trips on this hot endpoint.
     """
-    data = None
     rpc_name = "obter_comparacao_dados"
 
     def _strip_none_keep(d: Dict[str, Any], keep_keys: Optional[set] = None) -> Dict[str, Any]:
@@ -199,64 +280,44 @@ async def rpc_get_historico_e_previsao_raw(client, supabase_url: str, service_ke
 
     # Work on copies to avoid mutating caller dicts.
     params_plain_copy = dict(params_plain or {})
-    params_underscored_copy = dict(params_underscored or {})
 
     # Ensure the plain RPC param `insumo_nome` is always present (may be None).
     if "insumo_nome" not in params_plain_copy:
         # If caller supplied an underscored variant, try to map it, else None.
-        params_plain_copy["insumo_nome"] = params_underscored_copy.get("_insumo_nome") if "_insumo_nome" in params_underscored_copy else None
-
-    # Keep underscored param as well for SDK attempts (map from plain if missing)
-    if "_insumo_nome" not in params_underscored_copy:
-        params_underscored_copy["_insumo_nome"] = params_plain_copy.get("insumo_nome")
+        params_plain_copy["insumo_nome"] = (params_underscored or {}).get("_insumo_nome")
 
     # When stripping None values, preserve the insumo key (even if None) so
     # the HTTP RPC receives the parameter name explicitly.
-    underscored_payload = _strip_none_keep(params_underscored_copy, keep_keys={"_insumo_nome"})
     plain_payload = _strip_none_keep(params_plain_copy, keep_keys={"insumo_nome"})
 
-    if client is not None:
-        try:
-            # Try underscored payload first (SDK sometimes expects underscored names)
-            resp = client.rpc(rpc_name, underscored_payload if underscored_payload else None).execute()
-        except Exception:
-            try:
-                resp = client.rpc(rpc_name, plain_payload if plain_payload else None).execute()
-            except Exception:
-                resp = None
-
-        if resp is not None:
-            if hasattr(resp, "data"):
-                data = getattr(resp, "data")
-            elif isinstance(resp, dict):
-                data = resp.get("data") or resp.get("result") or resp.get("body")
-            else:
-                data = resp
-
-    if data is None:
-        rpc_url = f"{supabase_url.rstrip('/')}/rest/v1/rpc/{rpc_name}"
-        headers = {
-            "apikey": service_key,
-            "Authorization": f"Bearer {service_key}",
-            "Accept": "application/json",
-            "Content-Type": "application/json",
-        }
-        status, parsed = await http_rpc_call(rpc_url, headers, plain_payload)
+    def _build_underscored() -> Dict[str, Any]:
+        # Built lazily: the common (warmed) path never needs this dict.
+        if params_underscored is not None:
+            puc = dict(params_underscored)
+            if "_insumo_nome" not in puc:
+                puc["_insumo_nome"] = params_plain_copy.get("insumo_nome")
+            return _strip_none_keep(puc, keep_keys={"_insumo_nome"})
+        return {f"_{k}": v for k, v in plain_payload.items()}
+
+    rpc_url = _rpc_url(supabase_url, rpc_name)
+    headers = _rpc_headers(service_key)
+    # Try the convention that last succeeded for this RPC first; the wrong
+    # variant costs a full extra round-trip.
+    prefer_underscored = _RPC_PARAM_CONVENTION.get(rpc_name, "plain") == "underscored"
+    first_payload = _build_underscored() if prefer_underscored else plain_payload
+
+    status, parsed = await http_rpc_call(rpc_url, headers, first_payload)
+    if status in (200, 201):
+        _RPC_PARAM_CONVENTION[rpc_name] = "underscored" if prefer_underscored else "plain"
+        return parsed, parsed
+    # As a fallback try the other convention (if its payload differs)
+    second_payload = plain_payload if prefer_underscored else _build_underscored()
+    if second_payload and second_payload != first_payload:
+        status, parsed = await http_rpc_call(rpc_url, headers, second_payload)
         if status in (200, 201):
-            data = parsed
-            return data, parsed
-        else:
-            # As a fallback try underscored payload (if it differs)
-            if underscored_payload and underscored_payload != plain_payload:
-                status2, parsed2 = await http_rpc_call(rpc_url, headers, underscored_payload)
-                if status2 in (200, 201):
-                    data = parsed2
-                    return data, parsed2
-                else:
-                    return None, {"error": "http_rpc_failed", "status": status2, "details": parsed2}
-            return None, {"error": "http_rpc_failed", "status": status, "details": parsed}
-
-    return data, data
+            _RPC_PARAM_CONVENTION[rpc_name] = "plain" if prefer_underscored else "underscored"
+            return parsed, parsed
+    return None, {"error": "http_rpc_failed", "status": status, "details": parsed}
 
 
 async def rpc_obter_soma_por_ano_value(client, supabase_url: str, service_key: str, params_plain: Dict[str, Any], params_underscored: Dict[str, Any]) -> Tuple[Optional[float], Any]:
@@ -289,13 +350,8 @@ async def rpc_obter_soma_por_ano_value(client, supabase_url: str, service_key: s
                 soma_value = extract_number_from_rpc_result(resp)
 
     if soma_value is None:
-        rpc_url = f"{supabase_url.rstrip('/')}/rest/v1/rpc/{soma_rpc}"
-        headers = {
-            "apikey": service_key,
-            "Authorization": f"Bearer {service_key}",
-            "Accept": "application/json",
-            "Content-Type": "application/json",
-        }
+        rpc_url = _rpc_url(supabase_url, soma_rpc)
+        headers = _rpc_headers(service_key)
         status, parsed = await http_rpc_call(rpc_url, headers, plain_payload)
         if status in (200, 201):
             soma_rpc_raw = parsed
@@ -322,12 +378,12 @@ async def rpc_obter_soma_por_ano_value(client, supabase_url: str, service_key: s
                     if params_plain.get("insumo_nome"):
                         params["tx_insumo"] = f"ilike.*{params_plain.get('insumo_nome')}*"
 
-                    async with httpx.AsyncClient(timeout=30.0) as client:
-                        resp = await client.get(table_url, params=params, headers={
-                            "apikey": service_key,
-                            "Authorization": f"Bearer {service_key}",
-                            "Accept": "application/json",
-                        })
+                    httpcli = await get_http_client()
+                    resp = await httpcli.get(table_url, params=params, headers={
+                        "apikey": service_key,
+                        "Authorization": f"Bearer {service_key}",
+                        "Accept": "application/json",
+                    })
                     if resp.status_code == 200:
                         parsed_rows = resp.json()
                         soma_rpc_raw = parsed_rows
@@ -400,13 +456,8 @@ async def rpc_obter_projecao_ano(client, supabase_url: str, service_key: str, pa
                         break
 
     if proj_value is None:
-        rpc_url = f"{supabase_url.rstrip('/')}/rest/v1/rpc/{previsao_rpc}"
-        headers = {
-            "apikey": service_key,
-            "Authorization": f"Bearer {service_key}",
-            "Accept": "application/json",
-            "Content-Type": "application/json",
-        }
+        rpc_url = _rpc_url(supabase_url, previsao_rpc)
+        headers = _rpc_headers(service_key)
         status, parsed = await http_rpc_call(rpc_url, headers, plain_payload)
         if status in (200, 201) and isinstance(parsed, list):
             previsao_rpc_raw = parsed
@@ -477,6 +528,34 @@ async def rpc_median_projection_totals(client, supabase_url: str, service_key: s
     return median, raw_list
 
 
+def _coerce_timeseries_rows_vectorized(rows: list) -> Optional[list]:
+    """Coerce aggregated timeseries rows ({ano, mes, doses}) in bulk with
+    NumPy when the payload is large and uniformly shaped.
+
+    np.fromiter replaces per-row int()/float() calls and try/except frames
+    with array-wide casts, and lexsort replaces the lambda-keyed sort.
+    Returns None when NumPy is unavailable, the payload is small, or the
+    rows do not have the expected lowercase keys, so the caller can run the
+    per-row fallback.
+    """
+    if np is None or len(rows) <= 32:
+        return None
+    if not all(isinstance(r, dict) and "ano" in r and "mes" in r and "doses" in r for r in rows):
+        return None
+    try:
+        n = len(rows)
+        ano = np.fromiter(((r["ano"] or 0) for r in rows), dtype=np.int32, count=n)
+        mes = np.fromiter(((r["mes"] or 0) for r in rows), dtype=np.int32, count=n)
+        doses = np.fromiter((float(r["doses"] or 0) for r in rows), dtype=np.float64, count=n).astype(np.int64)
+    except Exception:
+        return None
+    order = np.lexsort((mes, ano))
+    return [
+        {"ano": int(ano[i]), "mes": int(mes[i]), "doses": int(doses[i])}
+        for i in order
+    ]
+
+
 async def rpc_timeseries_aggregated(
     client,
     supabase_url: str,
@@ -523,13 +602,8 @@ async def rpc_timeseries_aggregated(
                 rows = resp
 
     if rows is None:
-        rpc_url = f"{supabase_url.rstrip('/')}/rest/v1/rpc/{rpc_name}"
-        headers = {
-            "apikey": service_key,
-            "Authorization": f"Bearer {service_key}",
-            "Accept": "application/json",
-            "Content-Type": "application/json",
-        }
+        rpc_url = _rpc_url(supabase_url, rpc_name)
+        headers = _rpc_headers(service_key)
 
         status, parsed = await http_rpc_call(rpc_url, headers, underscored_payload)
         if status not in (200, 201):
@@ -543,20 +617,22 @@ async def rpc_timeseries_aggregated(
     if not isinstance(rows, list):
         return None, {"error": "rpc_invalid_shape", "details": rows}
 
-    normalized = []
-    for item in rows:
-        if not isinstance(item, dict):
-            continue
-        d = {str(k).lower(): v for k, v in item.items()}
-        try:
-            ano_val = int(d.get("ano") or 0)
-            mes_val = int(d.get("mes") or 0)
-            doses_val = int(float(d.get("doses") or 0))
-        except Exception:
-            continue
-        normalized.append({"ano": ano_val, "mes": mes_val, "doses": doses_val})
+    normalized = _coerce_timeseries_rows_vectorized(rows)
+    if normalized is None:
+        normalized = []
+        for item in rows:
+            if not isinstance(item, dict):
+                continue
+            d = {str(k).lower(): v for k, v in item.items()}
+            try:
+                ano_val = int(d.get("ano") or 0)
+                mes_val = int(d.get("mes") or 0)
+                doses_val = int(float(d.get("doses") or 0))
+            except Exception:
+                continue
+            normalized.append({"ano": ano_val, "mes": mes_val, "doses": doses_val})
 
-    normalized.sort(key=lambda x: (x.get("ano", 0), x.get("mes", 0)))
+        normalized.sort(key=lambda x: (x.get("ano", 0), x.get("mes", 0)))
     return normalized, rows
 
 
@@ -606,13 +682,8 @@ async def rpc_overview_aggregated(
                 rows = resp
 
     if rows is None:
-        rpc_url = f"{supabase_url.rstrip('/')}/rest/v1/rpc/{rpc_name}"
-        headers = {
-            "apikey": service_key,
-            "Authorization": f"Bearer {service_key}",
-            "Accept": "application/json",
-            "Content-Type": "application/json",
-        }
+        rpc_url = _rpc_url(supabase_url, rpc_name)
+        headers = _rpc_headers(service_key)
 
         status, parsed = await http_rpc_call(rpc_url, headers, underscored_payload)
         if status not in (200, 201):
@@ -689,13 +760,8 @@ async def rpc_ranking_ufs_aggregated(
                 rows = resp
 
     if rows is None:
-        rpc_url = f"{supabase_url.rstrip('/')}/rest/v1/rpc/{rpc_name}"
-        headers = {
-            "apikey": service_key,
-            "Authorization": f"Bearer {service_key}",
-            "Accept": "application/json",
-            "Content-Type": "application/json",
-        }
+        rpc_url = _rpc_url(supabase_url, rpc_name)
+        headers = _rpc_headers(service_key)
 
         status, parsed = await http_rpc_call(rpc_url, headers, underscored_payload)
         if status not in (200, 201):
@@ -779,13 +845,8 @@ async def rpc_top_vacinas_aggregated(
                 rows = resp
 
     if rows is None:
-        rpc_url = f"{supabase_url.rstrip('/')}/rest/v1/rpc/{rpc_name}"
-        headers = {
-            "apikey": service_key,
-            "Authorization": f"Bearer {service_key}",
-            "Accept": "application/json",
-            "Content-Type": "application/json",
-        }
+        rpc_url = _rpc_url(supabase_url, rpc_name)
+        headers = _rpc_headers(service_key)
 
         status, parsed = await http_rpc_call(rpc_url, headers, underscored_payload)
         if status not in (200, 201):
@@ -867,13 +928,8 @@ async def rpc_sazonalidade_agrupada(
                 rows = resp
 
     if rows is None:
-        rpc_url = f"{supabase_url.rstrip('/')}/rest/v1/rpc/{rpc_name}"
-        headers = {
-            "apikey": service_key,
-            "Authorization": f"Bearer {service_key}",
-            "Accept": "application/json",
-            "Content-Type": "application/json",
-        }
+        rpc_url = _rpc_url(supabase_url, rpc_name)
+        headers = _rpc_headers(service_key)
 
         status, parsed = await http_rpc_call(rpc_url, headers, underscored_payload)
         if status not in (200, 201):
@@ -954,13 +1010,8 @@ async def rpc_detalhes_geograficos_agrupados(
                 rows = resp
 
     if rows is None:
-        rpc_url = f"{supabase_url.rstrip('/')}/rest/v1/rpc/{rpc_name}"
-        headers = {
-            "apikey": service_key,
-            "Authorization": f"Bearer {service_key}",
-            "Accept": "application/json",
-            "Content-Type": "application/json",
-        }
+        rpc_url = _rpc_url(supabase_url, rpc_name)
+        headers = _rpc_headers(service_key)
 
         status, parsed = await http_rpc_call(rpc_url, headers, underscored_payload)
         if status not in (200, 201):
@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Query
-from fastapi.responses import JSONResponse
-from typing import Optional, Any, Dict, List
+from fastapi.responses import ORJSONResponse
+from typing import Optional, Any, Dict, List, Tuple
 import os
 import re
 import json
@@ -144,9 +144,9 @@ async def api_overview(ano: Optional[str] = Query(None), mes: Optional[str] = Qu
         )
         if rpc_result is not None:
             total_doses = rpc_result.get("total_doses", 0)
-            return JSONResponse(status_code=200, content={"total_doses": total_doses, "periodo": None})
+            return ORJSONResponse(status_code=200, content={"total_doses": total_doses, "periodo": None})
         logger.warning("RPC obter_overview_agrupado indisponível: %s", rpc_raw)
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=502,
             content={
                 "erro": "RPC obter_overview_agrupado indisponível.",
@@ -174,7 +174,7 @@ async def api_overview(ano: Optional[str] = Query(None), mes: Optional[str] = Qu
 
     matched = [r for r in rows if row_matches(r)]
     total = sum(int(r.get("qtde") or 0) for r in matched)
-    return JSONResponse(status_code=200, content={"total_doses": total, "periodo": None})
+    return ORJSONResponse(status_code=200, content={"total_doses": total, "periodo": None})
 
 
 @router.get("/api/timeseries")
@@ -215,9 +215,9 @@ async def api_timeseries(ano: Optional[str] = Query(None), mes: Optional[str] =
                         "doses_distribuidas": doses,
                     }
                 )
-            return JSONResponse(status_code=200, content=result)
+            return ORJSONResponse(status_code=200, content=result)
         logger.warning("RPC obter_serie_temporal_agrupada indisponível: %s", rpc_raw)
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=502,
             content={
                 "erro": "RPC obter_serie_temporal_agrupada indisponível.",
@@ -258,7 +258,7 @@ async def api_timeseries(ano: Optional[str] = Query(None), mes: Optional[str] =
         }
         for k, v in sorted(buckets.items())
     ]
-    return JSONResponse(status_code=200, content=result)
+    return ORJSONResponse(status_code=200, content=result)
 
 
 @router.get("/api/ranking/ufs")
@@ -292,9 +292,9 @@ async def api_ranking_ufs(ano: Optional[str] = Query(None), mes: Optional[str] =
                 }
                 for r in rpc_rows
             ]
-            return JSONResponse(status_code=200, content=result)
+            return ORJSONResponse(status_code=200, content=result)
         logger.warning("RPC obter_ranking_ufs_agrupado indisponível: %s", rpc_raw)
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=502,
             content={
                 "erro": "RPC obter_ranking_ufs_agrupado indisponível.",
@@ -326,7 +326,7 @@ async def api_ranking_ufs(ano: Optional[str] = Query(None), mes: Optional[str] =
         buckets[ufv] += int(r.get("qtde") or 0)
 
     res = [{"uf": k, "sigla": k, "doses_distribuidas": v} for k, v in sorted(buckets.items(), key=lambda x: -x[1])]
-    return JSONResponse(status_code=200, content=res)
+    return ORJSONResponse(status_code=200, content=res)
 
 
 @router.get("/api/top-vacinas")
@@ -363,10 +363,10 @@ async def api_top_vacinas(
                 for r in rpc_rows
                 if r.get("tx_insumo")
             ]
-            return JSONResponse(status_code=200, content=result)
+            return ORJSONResponse(status_code=200, content=result)
 
         logger.warning("RPC obter_top_vacinas_agrupadas indisponível: %s", rpc_raw)
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=502,
             content={
                 "erro": "RPC obter_top_vacinas_agrupadas indisponível.",
@@ -374,7 +374,7 @@ async def api_top_vacinas(
             },
         )
 
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=500,
         content={"erro": "Supabase não está configurado no servidor (verifique SUPABASE_URL e SUPABASE_SERVICE_ROLE_KEY)."},
     )
@@ -412,10 +412,10 @@ async def api_sazonalidade(
                 for r in rpc_rows
                 if int(r.get("mes") or 0) > 0
             ]
-            return JSONResponse(status_code=200, content=result)
+            return ORJSONResponse(status_code=200, content=result)
 
         logger.warning("RPC obter_sazonalidade_agrupada indisponível: %s", rpc_raw)
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=502,
             content={
                 "erro": "RPC obter_sazonalidade_agrupada indisponível.",
@@ -423,7 +423,7 @@ async def api_sazonalidade(
             },
         )
 
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=500,
         content={"erro": "Supabase não está configurado no servidor (verifique SUPABASE_URL e SUPABASE_SERVICE_ROLE_KEY)."},
     )
@@ -462,10 +462,10 @@ async def api_detalhes_geograficos(
                 for r in rpc_rows
                 if r.get("tx_sigla") and r.get("tx_insumo")
             ]
-            return JSONResponse(status_code=200, content=result)
+            return ORJSONResponse(status_code=200, content=result)
 
         logger.warning("RPC obter_detalhes_geograficos_agrupados indisponível: %s", rpc_raw)
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=502,
             content={
                 "erro": "RPC obter_detalhes_geograficos_agrupados indisponível.",
@@ -473,7 +473,7 @@ async def api_detalhes_geograficos(
             },
         )
 
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=500,
         content={"erro": "Supabase não está configurado no servidor (verifique SUPABASE_URL e SUPABASE_SERVICE_ROLE_KEY)."},
     )
@@ -483,7 +483,7 @@ async def api_detalhes_geograficos(
 async def api_forecast(ano: Optional[str] = Query(None), mes: Optional[str] = Query(None), uf: Optional[str] = Query(None), fabricante: Optional[str] = Query(None)):
     # Behavior: if no filters provided, return empty list
     if not any([ano, mes, uf, fabricante]):
-        return JSONResponse(status_code=200, content=[])
+        return ORJSONResponse(status_code=200, content=[])
 
     # Fast path: use RPC aggregated timeseries to avoid downloading raw rows.
     ensure_loaded_backend_env()
@@ -515,9 +515,9 @@ async def api_forecast(ano: Optional[str] = Query(None), mes: Optional[str] = Qu
                         except Exception:
                             continue
                 if not vals:
-                    return JSONResponse(status_code=200, content=[])
+                    return ORJSONResponse(status_code=200, content=[])
                 avg = sum(vals) / len(vals)
-                return JSONResponse(status_code=200, content=[{"data": f"2025-{int(mes):02d}", "doses_previstas": avg, "doses_projecao": avg}])
+                return ORJSONResponse(status_code=200, content=[{"data": f"2025-{int(mes):02d}", "doses_previstas": avg, "doses_projecao": avg}])
             else:
                 # annual totals across aggregated rows
                 totals_by_year: Dict[int, float] = {}
@@ -529,11 +529,11 @@ async def api_forecast(ano: Optional[str] = Query(None), mes: Optional[str] = Qu
                     except Exception:
                         continue
                 if not totals_by_year:
-                    return JSONResponse(status_code=200, content=[])
+                    return ORJSONResponse(status_code=200, content=[])
                 # simple projection: average of annual totals
                 years = sorted(totals_by_year.keys())
                 avg = sum(totals_by_year[y] for y in years) / len(years)
-                return JSONResponse(status_code=200, content=[{"data": "2025", "doses_previstas": avg, "doses_projecao": avg}])
+                return ORJSONResponse(status_code=200, content=[{"data": "2025", "doses_previstas": avg, "doses_projecao": avg}])
         # RPC failed; use fallback
         logger.warning("RPC obter_serie_temporal_agrupada indisponível para forecast: %s", rpc_raw)
 
@@ -576,9 +576,9 @@ async def api_forecast(ano: Optional[str] = Query(None), mes: Optional[str] = Qu
                 except Exception:
                     continue
         if not vals:
-            return JSONResponse(status_code=200, content=[])
+            return ORJSONResponse(status_code=200, content=[])
         avg = sum(vals) / len(vals)
-        return JSONResponse(status_code=200, content=[{"data": f"2025-{int(mes):02d}", "doses_previstas": avg, "doses_projecao": avg}])
+        return ORJSONResponse(status_code=200, content=[{"data": f"2025-{int(mes):02d}", "doses_previstas": avg, "doses_projecao": avg}])
     else:
         # annual totals across years
         totals_by_year: Dict[int, float] = {}
@@ -590,11 +590,11 @@ async def api_forecast(ano: Optional[str] = Query(None), mes: Optional[str] = Qu
             except Exception:
                 continue
         if not totals_by_year:
-            return JSONResponse(status_code=200, content=[])
+            return ORJSONResponse(status_code=200, content=[])
         # simple projection: average of annual totals
         years = sorted(totals_by_year.keys())
         avg = sum(totals_by_year[y] for y in years) / len(years)
-        return JSONResponse(status_code=200, content=[{"data": "2025", "doses_previstas": avg, "doses_projecao": avg}])
+        return ORJSONResponse(status_code=200, content=[{"data": "2025", "doses_previstas": avg, "doses_projecao": avg}])
 
 
 @router.get("/api/mappings")
@@ -611,7 +611,7 @@ async def api_mappings():
         seen.add(it)
         uniq.append(it)
     uniq.sort()
-    return JSONResponse(status_code=200, content={"vacinas": uniq})
+    return ORJSONResponse(status_code=200, content={"vacinas": uniq})
 
 
 @router.get("/api/mappings/available")
@@ -652,7 +652,7 @@ async def api_mappings_available(ano: int = Query(2024)):
         if total and float(total) > 0.0:
             resp.append({"vacina": vac, "total_doses": int(total), "ano_base": ano})
 
-    return JSONResponse(status_code=200, content=resp)
+    return ORJSONResponse(status_code=200, content=resp)
 
 
 def _find_insumo_pattern(normalizer, insumo_norm: Optional[str], original: str) -> Optional[str]:
@@ -687,6 +687,37 @@ def _find_insumo_pattern(normalizer, insumo_norm: Optional[str], original: str)
     return None
 
 
+# Snapshot of (SUPABASE_URL without trailing slash, service key). The env
+# only changes at process start, so /previsao reads it once instead of
+# re-running ensure_loaded_backend_env + os.getenv on every request.
+_CFG: Optional[Tuple[str, str]] = None
+
+
+def _cfg() -> Optional[Tuple[str, str]]:
+    global _CFG
+    if _CFG is None:
+        ensure_loaded_backend_env()
+        u = os.getenv("SUPABASE_URL")
+        k = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
+        if u and k:
+            _CFG = (u.rstrip("/"), k)
+    return _CFG
+
+
+# Interned once: the same "no data" message is returned from several
+# branches of /previsao.
+_NO_DATA = "Nenhum dado encontrado para os filtros fornecidos."
+
+
+def _err(status: int, data: Any, debug: Optional[bool]) -> ORJSONResponse:
+    """Build the standard error response, attaching the raw RPC payload only
+    when debug output was requested."""
+    body: Dict[str, Any] = {"erro": _NO_DATA}
+    if debug:
+        body["rpc_raw"] = data
+    return ORJSONResponse(status_code=status, content=body)
+
+
 @router.get("/previsao")
 async def previsao(
     insumo_nome: Optional[str] = Query(None),
@@ -705,37 +736,33 @@ async def previsao(
     """
     # Validação crítica: insumo_nome
     if not insumo_nome:
-        return JSONResponse(status_code=400, content={"erro": "É obrigatório informar o nome da vacina (insumo_nome) para plotar o gráfico de previsão."})
+        return ORJSONResponse(status_code=400, content={"erro": "É obrigatório informar o nome da vacina (insumo_nome) para plotar o gráfico de previsão."})
 
-    # ensure env loaded and required vars present
-    ensure_loaded_backend_env()
-    SUPABASE_URL = os.getenv("SUPABASE_URL")
-    SUPABASE_SERVICE_ROLE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
-    if not SUPABASE_URL or not SUPABASE_SERVICE_ROLE_KEY:
-        return JSONResponse(status_code=500, content={"erro": "Supabase não está configurado no servidor (verifique SUPABASE_URL e SUPABASE_SERVICE_ROLE_KEY)."})
+    # cached env snapshot (loaded once per process)
+    cfg = _cfg()
+    if cfg is None:
+        return ORJSONResponse(status_code=500, content={"erro": "Supabase não está configurado no servidor (verifique SUPABASE_URL e SUPABASE_SERVICE_ROLE_KEY)."})
+    SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY = cfg
 
-    # prepare params
+    # prepare params (the repository derives the underscored variant only if
+    # the plain convention is rejected)
     insumo_nome_trim = str(insumo_nome).strip()
     uf_trim = str(uf).strip() if uf else None
     params_plain: Dict[str, Any] = {"insumo_nome": insumo_nome_trim}
-    params_underscored: Dict[str, Any] = {"_insumo_nome": insumo_nome_trim}
     if uf_trim:
         params_plain["uf"] = uf_trim
-        params_underscored["_uf"] = uf_trim
     if mes is not None:
         try:
             mes_int = int(mes)
         except Exception:
-            return JSONResponse(status_code=400, content={"erro": "Parâmetro 'mes' inválido. Deve ser um número inteiro (1-12)."})
+            return ORJSONResponse(status_code=400, content={"erro": "Parâmetro 'mes' inválido. Deve ser um número inteiro (1-12)."})
         params_plain["mes"] = mes_int
-        params_underscored["_mes"] = mes_int
 
-    # Resolve Supabase client and call RPC using repository helpers
-    client = get_supabase_client()
-    data, rpc_raw = await rpc_get_historico_e_previsao_raw(client, SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY, params_plain, params_underscored)
+    # Call the RPC directly over async HTTP (no sync SDK hop)
+    data, rpc_raw = await rpc_get_historico_e_previsao_raw(SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY, params_plain)
     if data is None:
         # rpc_raw is expected to contain error info when call failed
-        return JSONResponse(status_code=502, content={"erro": "Falha ao chamar RPC via HTTP no Supabase.", "details": rpc_raw})
+        return ORJSONResponse(status_code=502, content={"erro": "Falha ao chamar RPC via HTTP no Supabase.", "details": rpc_raw})
 
     # The RPC `obter_comparacao_dados` is expected to return
     # a list of objects. Per spec we must return that list exactly as
@@ -755,22 +782,18 @@ async def previsao(
                     q = nr.get("quantidade")
                     if q is None or (isinstance(q, (int, float)) and float(q) == 0):
                         # No historical data found by the RPC — treat as empty result.
-                        if debug:
-                            return JSONResponse(status_code=404, content={"rpc_raw": data, "erro": "Nenhum dado encontrado para os filtros fornecidos."})
-                        return JSONResponse(status_code=404, content={"erro": "Nenhum dado encontrado para os filtros fornecidos."})
+                        return _err(404, data, debug)
         except Exception:
             # non-fatal: fall through to return raw data below
             pass
 
         # If the RPC returned an empty list, return 404 (no data)
         if len(data) == 0:
-            if debug:
-                return JSONResponse(status_code=404, content={"rpc_raw": data, "erro": "Nenhum dado encontrado para os filtros fornecidos."})
-            return JSONResponse(status_code=404, content={"erro": "Nenhum dado encontrado para os filtros fornecidos."})
+            return _err(404, data, debug)
 
         if debug:
-            return JSONResponse(status_code=200, content={"rpc_raw": data})
-        return JSONResponse(status_code=200, content=data)
+            return ORJSONResponse(status_code=200, content={"rpc_raw": data})
+        return ORJSONResponse(status_code=200, content=data)
 
     # If PostgREST wrapped the list in a dict under common keys, unwrap it.
     if isinstance(data, dict):
@@ -784,25 +807,19 @@ async def previsao(
                         q = nr.get("quantidade")
                         if q is None or (isinstance(q, (int, float)) and float(q) == 0):
                             # No historical data found by the RPC — treat as empty result.
-                            if debug:
-                                return JSONResponse(status_code=404, content={"rpc_raw": data, "erro": "Nenhum dado encontrado para os filtros fornecidos."})
-                            return JSONResponse(status_code=404, content={"erro": "Nenhum dado encontrado para os filtros fornecidos."})
+                            return _err(404, data, debug)
             except Exception:
                 pass
 
             if len(candidate) == 0:
-                if debug:
-                    return JSONResponse(status_code=404, content={"rpc_raw": data, "erro": "Nenhum dado encontrado para os filtros fornecidos."})
-                return JSONResponse(status_code=404, content={"erro": "Nenhum dado encontrado para os filtros fornecidos."})
+                return _err(404, data, debug)
 
             if debug:
-                return JSONResponse(status_code=200, content={"rpc_raw": data, "result": candidate})
-            return JSONResponse(status_code=200, content=candidate)
+                return ORJSONResponse(status_code=200, content={"rpc_raw": data, "result": candidate})
+            return ORJSONResponse(status_code=200, content=candidate)
 
     # Fallback: return empty list (and include rpc_raw if debug requested).
-    if debug:
-        return JSONResponse(status_code=404, content={"rpc_raw": data, "erro": "Nenhum dado encontrado para os filtros fornecidos."})
-    return JSONResponse(status_code=404, content={"erro": "Nenhum dado encontrado para os filtros fornecidos."})
+    return _err(404, data, debug)
 
 
 
@@ -828,17 +845,16 @@ async def previsao_comparacao(
     """
     # Validações iniciais
     if ano is None or int(ano) != 2024:
-        return JSONResponse(status_code=400, content={"erro": "Para gerar a comparação de previsão, o ano base precisa ser 2024."})
+        return ORJSONResponse(status_code=400, content={"erro": "Para gerar a comparação de previsão, o ano base precisa ser 2024."})
 
     # Validação: insumo_nome é obrigatório para a comparação
     # insumo_nome is optional here: when omitted the route computes totals across all vacinas
 
-    # ensure env loaded and required vars present
-    ensure_loaded_backend_env()
-    SUPABASE_URL = os.getenv("SUPABASE_URL")
-    SUPABASE_SERVICE_ROLE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
-    if not SUPABASE_URL or not SUPABASE_SERVICE_ROLE_KEY:
-        return JSONResponse(status_code=500, content={"erro": "Supabase não está configurado no servidor (verifique SUPABASE_URL e SUPABASE_SERVICE_ROLE_KEY)."})
+    # cached env snapshot (loaded once per process)
+    cfg = _cfg()
+    if cfg is None:
+        return ORJSONResponse(status_code=500, content={"erro": "Supabase não está configurado no servidor (verifique SUPABASE_URL e SUPABASE_SERVICE_ROLE_KEY)."})
+    SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY = cfg
 
     insumo_nome_trim = str(insumo_nome).strip() if insumo_nome else None
     uf_trim = str(uf).strip() if uf else None
@@ -976,15 +992,15 @@ async def previsao_comparacao(
         resp_payload_debug["rpc_raw_timeseries"] = rpc_raw_debug
         try:
             validated = ComparisonResponse(**resp_payload_debug)
-            return JSONResponse(status_code=200, content=validated.dict())
+            return ORJSONResponse(status_code=200, content=validated.dict())
         except Exception:
-            return JSONResponse(status_code=200, content=resp_payload_debug)
+            return ORJSONResponse(status_code=200, content=resp_payload_debug)
 
     try:
         validated = ComparisonResponse(**resp_payload)
-        return JSONResponse(status_code=200, content=validated.dict())
+        return ORJSONResponse(status_code=200, content=validated.dict())
     except Exception:
-        return JSONResponse(status_code=200, content=resp_payload)
+        return ORJSONResponse(status_code=200, content=resp_payload)
 
 
 # Backwards-compatible alias: frontend expects /api/previsao/comparacao
@@ -1,4 +1,4 @@
-import psycopg
+from psycopg_pool import ConnectionPool
 from dotenv import load_dotenv
 import os
 import logging
@@ -15,32 +15,31 @@ DBNAME = os.getenv("dbname")
 
 logger = logging.getLogger(__name__)
 
+# Pool created closed; opened lazily on first use so importing this module
+# never touches the network. Reusing pooled connections amortizes the
+# TCP/TLS/startup negotiation to once per process instead of per call.
+_POOL = ConnectionPool(
+    conninfo=f"host={HOST} port={PORT} dbname={DBNAME} user={USER} password={PASSWORD}",
+    min_size=1,
+    max_size=10,
+    open=False,
+)
+
 
 def main():
-    # Connect to the database
+    # Borrow a pooled connection instead of opening a fresh one per call
     try:
-        # psycopg (v3) uses a very similar connect signature
-        connection = psycopg.connect(
-            user=USER,
-            password=PASSWORD,
-            host=HOST,
-            port=PORT,
-            dbname=DBNAME
-        )
-        logger.info("Connection successful")
-        
-        # Create a cursor to execute SQL queries
-        cursor = connection.cursor()
-        
-        # Example query
-        cursor.execute("SELECT NOW();")
-        result = cursor.fetchone()
-        logger.info("Current Time: %s", result)
-
-        # Close the cursor and connection
-        cursor.close()
-        connection.close()
-        logger.info("Connection closed")
+        if _POOL.closed:
+            _POOL.open()
+            logger.info("Connection pool opened")
+
+        with _POOL.connection() as connection:
+            with connection.cursor() as cursor:
+                # Example query
+                cursor.execute("SELECT NOW();")
+                result = cursor.fetchone()
+                logger.info("Current Time: %s", result)
+        logger.info("Connection returned to pool")
 
     except Exception as e:
         logger.exception("Failed to connect: %s", e)